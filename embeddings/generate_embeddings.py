@@ -4,14 +4,96 @@ import numpy as np
 import json
 from sentence_transformers import SentenceTransformer
 
+try:
+    from embeddings.vector_search import CHUNK_CHARS, ENCODE_BATCH_SIZE, split_passages
+except ImportError:
+    # Run as `python embeddings/generate_embeddings.py`
+    from vector_search import CHUNK_CHARS, ENCODE_BATCH_SIZE, split_passages
+
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "storage", "faculty.db")
 EMBEDDINGS_PATH = os.path.join(BASE_DIR, "embeddings", "embeddings.npy")
 METADATA_PATH = os.path.join(BASE_DIR, "embeddings", "metadata.json")
+PROJECTION_PATH = os.path.join(BASE_DIR, "embeddings", "projection.npz")
 
 MODEL_NAME = "all-MiniLM-L6-v2"
 
+# Optional dimensionality reduction (0 keeps the full 384-dim vectors)
+REDUCED_DIM = int(os.environ.get("EMBEDDING_REDUCED_DIM", "0"))
+REDUCTION_METHOD = os.environ.get("EMBEDDING_REDUCTION", "pca")  # "pca" or "random"
+RECALL_K = 10
+RECALL_SAMPLE = 1000  # max query rows scored by recall_at_k
+
+def fit_projection(embeddings, target_dim, method="pca"):
+    """
+    Returns (components, method) so that reduced = x @ components.T.
+    "pca" is an uncentered truncated SVD, so reduced cosine stays comparable to
+    the model's cosine (the keyword boosts in search assume raw cosine scores).
+    The SVD has at most n components; with n <= target_dim they span the whole
+    corpus, which loses nothing for ranking corpus rows.
+    """
+    data = embeddings.astype(np.float32)
+    n, dim = data.shape
+    if not 0 < target_dim < dim:
+        raise ValueError(f"Target dimension must be between 1 and {dim - 1}, got {target_dim}")
+
+    if method == "pca":
+        _, _, vt = np.linalg.svd(data, full_matrices=False)
+        if target_dim > len(vt):
+            print(f"WARNING: only {len(vt)} records available, using {len(vt)} PCA components instead of {target_dim}.")
+        components = vt[:target_dim]
+    elif method == "random":
+        rng = np.random.default_rng(0)
+        components = rng.standard_normal((target_dim, dim)) / np.sqrt(target_dim)
+    else:
+        raise ValueError(f"Unknown reduction method: {method}")
+
+    return components.astype(np.float32), method
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1e-8
+    return vectors / norms
+
+def recall_at_k(full, reduced, k=RECALL_K, passage_offsets=None):
+    """
+    Mean overlap of top-k cosine neighbours vs full-dim exact search, using each
+    row (up to RECALL_SAMPLE of them) as a query against all rows, with its own
+    row/faculty masked out.
+    With passage_offsets, candidates are ranked per faculty by max-sim, as in search.
+    The queries are corpus rows the projection was fitted on, so this is an
+    optimistic (in-sample) estimate of recall for real user queries.
+    """
+    full_vecs = _normalize(full.astype(np.float32))
+    reduced_vecs = _normalize(reduced.astype(np.float32))
+
+    # Score a sample of query rows against all rows to keep memory linear in corpus size
+    queries = np.arange(len(full))
+    if len(queries) > RECALL_SAMPLE:
+        queries = np.sort(np.random.default_rng(0).choice(queries, RECALL_SAMPLE, replace=False))
+    full_scores = full_vecs[queries] @ full_vecs.T
+    reduced_scores = reduced_vecs[queries] @ reduced_vecs.T
+    rows = np.arange(len(queries))
+
+    if passage_offsets is None:
+        own = queries
+    else:
+        offsets = np.asarray(passage_offsets, dtype=np.intp)
+        full_scores = np.maximum.reduceat(full_scores, offsets, axis=1)
+        reduced_scores = np.maximum.reduceat(reduced_scores, offsets, axis=1)
+        owner = np.repeat(np.arange(len(offsets)), np.diff(np.append(offsets, len(full))))
+        own = owner[queries]
+    full_scores[rows, own] = -np.inf
+    reduced_scores[rows, own] = -np.inf
+
+    k = min(k, full_scores.shape[1] - 1)
+
+    exact = np.argpartition(-full_scores, k - 1, axis=1)[:, :k]
+    approx = np.argpartition(-reduced_scores, k - 1, axis=1)[:, :k]
+    hits = [len(np.intersect1d(e, a)) for e, a in zip(exact, approx)]
+    return float(np.mean(hits)) / k
+
 def generate():
     print("Generating embeddings locally...")
     model = SentenceTransformer(MODEL_NAME)
@@ -23,28 +105,62 @@ def generate():
     ids = []
     texts = []
     raw_data = []
+    # passage_offsets[i] is the index of faculty i's first passage in `texts`
+    passage_offsets = [] if CHUNK_CHARS else None
     
     for r in rows:
         if r[1] and len(r[1].strip()) > 0:
             ids.append(r[0])
-            truncated = r[1][:500].strip()
-            texts.append(truncated)
+            if CHUNK_CHARS:
+                indexed = r[1].strip()
+                passage_offsets.append(len(texts))
+                texts.extend(split_passages(indexed, CHUNK_CHARS))
+            else:
+                indexed = r[1][:500].strip()
+                texts.append(indexed)
             raw_data.append({
                 "id": r[0],
-                "text": truncated.lower(),
+                "text": indexed.lower(),
                 "name": r[2].lower(),
                 "qual": r[3].lower() if r[3] else ""
             })
             
-    print(f"Encoding {len(texts)} records...")
-    embeddings = model.encode(texts, batch_size=1, convert_to_numpy=True).astype(np.float16)
+    if CHUNK_CHARS:
+        print(f"Encoding {len(texts)} passages ({CHUNK_CHARS} chars) for {len(ids)} records...")
+        embeddings = model.encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True).astype(np.float16)
+    else:
+        print(f"Encoding {len(texts)} records...")
+        embeddings = model.encode(texts, batch_size=1, convert_to_numpy=True).astype(np.float16)
+
+    reduction = None
+    if REDUCED_DIM:
+        print(f"Reducing {embeddings.shape[1]} -> {REDUCED_DIM} dims ({REDUCTION_METHOD})...")
+        components, method = fit_projection(embeddings, REDUCED_DIM, REDUCTION_METHOD)
+        reduced = (embeddings.astype(np.float32) @ components.T).astype(np.float16)
+        recall = recall_at_k(embeddings, reduced, passage_offsets=passage_offsets)
+        print(
+            f"Recall@{RECALL_K} vs full-dimension exact search: {recall:.3f} "
+            "(in-sample: corpus rows as queries, optimistic for real queries)"
+        )
+
+        np.savez(PROJECTION_PATH, components=components)
+        reduction = {"method": method, "dim": len(components), f"recall@{RECALL_K}": recall}
+        embeddings = reduced
+    elif os.path.exists(PROJECTION_PATH):
+        # Full-dim build: drop a stale projection so search doesn't apply it
+        os.remove(PROJECTION_PATH)
     
     # Save files
     np.save(EMBEDDINGS_PATH, embeddings)
     with open(METADATA_PATH, "w") as f:
-        json.dump({"ids": ids, "raw_data": raw_data}, f)
+        json.dump({
+            "ids": ids,
+            "raw_data": raw_data,
+            "reduction": reduction,
+            "passage_offsets": passage_offsets,
+        }, f)
         
-    print(f"✅ Success! Saved {len(ids)} embeddings to {EMBEDDINGS_PATH}")
+    print(f"✅ Success! Saved {len(embeddings)} embeddings ({embeddings.shape[1]} dims) for {len(ids)} records to {EMBEDDINGS_PATH}")
 
 if __name__ == "__main__":
     generate()
@@ -19,9 +19,28 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "storage", "faculty.db")
 EMBEDDINGS_PATH = os.path.join(BASE_DIR, "embeddings", "embeddings.npy")
 METADATA_PATH = os.path.join(BASE_DIR, "embeddings", "metadata.json")
+PROJECTION_PATH = os.path.join(BASE_DIR, "embeddings", "projection.npz")
 
 MODEL_NAME = "all-MiniLM-L6-v2"
 
+# Chunked multi-vector indexing (0 keeps the legacy single 500-char vector per profile)
+CHUNK_CHARS = int(os.environ.get("EMBEDDING_CHUNK_CHARS", "0"))
+ENCODE_BATCH_SIZE = 64
+
+def split_passages(text, size):
+    """Packs whole words into passages of at most `size` characters."""
+    passages = []
+    current = ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > size:
+            passages.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        passages.append(current)
+    return passages
+
 def cosine_similarity_manual(v1, v2):
     v1_fixed = v1.reshape(1, -1)
     dot_product = np.dot(v1_fixed, v2.T).flatten()
@@ -38,6 +57,10 @@ class FacultyVectorSearch:
         self.faculty_ids = []
         self.embeddings = None
         self.raw_data = []
+        # Projection components when embeddings were built with a reduced dimension
+        self.projection = None
+        # Start row of each faculty's passages when embeddings are chunked
+        self.passage_offsets = None
 
     def load_data(self):
         # 1. Check if we have pre-computed embeddings
@@ -48,6 +71,18 @@ class FacultyVectorSearch:
                 meta = json.load(f)
                 self.faculty_ids = meta["ids"]
                 self.raw_data = meta["raw_data"]
+            if meta.get("passage_offsets") is not None:
+                self.passage_offsets = np.asarray(meta["passage_offsets"], dtype=np.intp)
+                print(f"DEBUG: Chunked index with {len(self.embeddings)} passages.")
+            if meta.get("reduction"):
+                proj = np.load(PROJECTION_PATH)
+                self.projection = proj["components"]
+                if self.projection.shape[0] != self.embeddings.shape[1]:
+                    raise RuntimeError(
+                        f"Projection dim {self.projection.shape[0]} does not match "
+                        f"embeddings dim {self.embeddings.shape[1]}. Re-run generate_embeddings.py."
+                    )
+                print(f"DEBUG: Using {meta['reduction']['method']} projection to {self.embeddings.shape[1]} dims.")
             print(f"✅ SUCCESS: Loaded {len(self.faculty_ids)} embeddings from disk.")
             return
 
@@ -63,15 +98,21 @@ class FacultyVectorSearch:
             raise RuntimeError("No faculty data found in database.")
 
         texts = []
+        offsets = []
         for r in rows:
             content = r[1]
             if content and len(content.strip()) > 0:
                 self.faculty_ids.append(r[0])
-                truncated_text = content[:500].strip()
-                texts.append(truncated_text)
+                if CHUNK_CHARS:
+                    indexed_text = content.strip()
+                    offsets.append(len(texts))
+                    texts.extend(split_passages(indexed_text, CHUNK_CHARS))
+                else:
+                    indexed_text = content[:500].strip()
+                    texts.append(indexed_text)
                 self.raw_data.append({
                     "id": r[0],
-                    "text": truncated_text.lower(),
+                    "text": indexed_text.lower(),
                     "name": r[2].lower(),
                     "qual": r[3].lower() if r[3] else "",
                 })
@@ -79,12 +120,18 @@ class FacultyVectorSearch:
         del rows
         gc.collect()
 
-        dim = 384
-        self.embeddings = np.zeros((len(texts), dim), dtype=np.float16)
-        
-        for i, text in enumerate(texts):
-            vec = self.model.encode([text], show_progress_bar=False, convert_to_numpy=True)
-            self.embeddings[i] = vec[0].astype(np.float16)
+        if CHUNK_CHARS:
+            self.passage_offsets = np.asarray(offsets, dtype=np.intp)
+            self.embeddings = self.model.encode(
+                texts, batch_size=ENCODE_BATCH_SIZE, show_progress_bar=False, convert_to_numpy=True
+            ).astype(np.float16)
+        else:
+            dim = 384
+            self.embeddings = np.zeros((len(texts), dim), dtype=np.float16)
+
+            for i, text in enumerate(texts):
+                vec = self.model.encode([text], show_progress_bar=False, convert_to_numpy=True)
+                self.embeddings[i] = vec[0].astype(np.float16)
         
         del texts
         gc.collect()
@@ -94,8 +141,14 @@ class FacultyVectorSearch:
         if self.embeddings is None:
             return []
             
-        query_embedding = self.model.encode([query], convert_to_numpy=True).astype(np.float16)
+        query_embedding = self.model.encode([query], convert_to_numpy=True)
+        if self.projection is not None:
+            query_embedding = query_embedding @ self.projection.T
+        query_embedding = query_embedding.astype(np.float16)
         scores = cosine_similarity_manual(query_embedding, self.embeddings)
+        if self.passage_offsets is not None:
+            # Max-sim over each faculty's contiguous block of passages
+            scores = np.maximum.reduceat(scores, self.passage_offsets)
 
         final_results = []
         query_lower = query.lower()
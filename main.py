@@ -1,11 +1,15 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 import sqlite3
 import os
+import gzip
+import hashlib
+import mimetypes
 import threading
 import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 # -----------------------------
 # App
@@ -98,6 +102,7 @@ def health_check():
     }
     if semantic_engine:
         stats["records_loaded"] = len(semantic_engine.faculty_ids)
+    stats["search"] = search_snapshot()
     
     # Try a live DB count
     try:
@@ -134,8 +139,84 @@ def get_faculty_by_id(faculty_id: int):
 
     return dict(row)
 
+# -----------------------------
+# Search admission control
+# -----------------------------
+# Inference runs on its own small pool so /health and /faculty keep using
+# FastAPI's threadpool while search is saturated.
+SEARCH_CONCURRENCY = int(os.environ.get("SEARCH_CONCURRENCY", "2"))
+SEARCH_QUEUE_DEPTH = int(os.environ.get("SEARCH_QUEUE_DEPTH", "8"))
+SEARCH_DEADLINE_SECONDS = float(os.environ.get("SEARCH_DEADLINE_SECONDS", "10"))
+SEARCH_RETRY_AFTER_SECONDS = int(os.environ.get("SEARCH_RETRY_AFTER_SECONDS", "2"))
+# Extra time the caller waits past the deadline, so a job that started just
+# before it can finish and late queued jobs are dropped by the worker
+SEARCH_GRACE_SECONDS = float(os.environ.get("SEARCH_GRACE_SECONDS", "2"))
+
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_CONCURRENCY, thread_name_prefix="search")
+search_lock = threading.Lock()
+search_stats = {
+    "in_flight": 0,   # admitted and not yet finished (running + queued)
+    "running": 0,
+    "admitted": 0,
+    "rejected": 0,
+    "expired": 0,     # deadline passed while queued; dropped by the worker
+    "timed_out": 0,   # caller gave up waiting after the grace period
+}
+
+def search_snapshot():
+    with search_lock:
+        stats = dict(search_stats)
+    stats["queue_depth"] = stats["in_flight"] - stats["running"]
+    stats["concurrency"] = SEARCH_CONCURRENCY
+    stats["max_queue_depth"] = SEARCH_QUEUE_DEPTH
+    return stats
+
+def run_search(q, top_k, deadline):
+    with search_lock:
+        if time.monotonic() >= deadline:
+            search_stats["expired"] += 1
+            return None
+        search_stats["running"] += 1
+    try:
+        results = semantic_engine.search(q, top_k)
+
+        conn = get_db_connection()
+        output = []
+
+        for faculty_id, score in results:
+            row = conn.execute(
+                "SELECT id, name, email, qualification, profile_url, image_url FROM Faculty WHERE id = ?",
+                (faculty_id,)
+            ).fetchone()
+
+            if row:
+                data = dict(row)
+                data["similarity"] = round(float(score), 4)
+                output.append(data)
+
+        conn.close()
+        return output
+    finally:
+        with search_lock:
+            search_stats["running"] -= 1
+
+def release_search_slot(_future):
+    with search_lock:
+        search_stats["in_flight"] -= 1
+
+def overloaded(detail, status_code=429):
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(SEARCH_RETRY_AFTER_SECONDS)},
+    )
+
+@app.get("/search-stats")
+def get_search_stats():
+    return search_snapshot()
+
 @app.get("/semantic-search")
-def semantic_search(
+async def semantic_search(
     q: str = Query(...),
     top_k: int = 5
 ):
@@ -145,23 +226,31 @@ def semantic_search(
             detail = f"Search engine failed to load: {app.state.engine_error}"
         raise HTTPException(status_code=503, detail=detail)
 
-    results = semantic_engine.search(q, top_k)
+    with search_lock:
+        if search_stats["in_flight"] >= SEARCH_CONCURRENCY + SEARCH_QUEUE_DEPTH:
+            search_stats["rejected"] += 1
+            raise overloaded("Search is at capacity. Please retry shortly.")
+        search_stats["in_flight"] += 1
+        search_stats["admitted"] += 1
 
-    conn = get_db_connection()
-    output = []
-
-    for faculty_id, score in results:
-        row = conn.execute(
-            "SELECT id, name, email, qualification, profile_url, image_url FROM Faculty WHERE id = ?",
-            (faculty_id,)
-        ).fetchone()
+    deadline = time.monotonic() + SEARCH_DEADLINE_SECONDS
+    future = search_executor.submit(run_search, q, top_k, deadline)
+    future.add_done_callback(release_search_slot)
 
-        if row:
-            data = dict(row)
-            data["similarity"] = round(float(score), 4)
-            output.append(data)
+    try:
+        output = await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            timeout=deadline - time.monotonic() + SEARCH_GRACE_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        # Drops the job if it is still queued; a running encode can't be interrupted
+        future.cancel()
+        with search_lock:
+            search_stats["timed_out"] += 1
+        output = None
 
-    conn.close()
+    if output is None:
+        raise overloaded("Search timed out under load. Please retry shortly.", status_code=503)
     return output
 
 # -----------------------------
@@ -169,26 +258,118 @@ def semantic_search(
 # -----------------------------
 FRONTEND_DIST = os.path.join(BASE_DIR, "frontend", "dist")
 
-if os.path.exists(FRONTEND_DIST):
-    app.mount(
-        "/assets",
-        StaticFiles(directory=os.path.join(FRONTEND_DIST, "assets")),
-        name="assets"
-    )
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 256
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def build_asset_manifest(dist_dir):
+    """
+    Reads the whole build into memory once, with gzip/brotli variants precomputed.
+    Maps URL path -> {"type", "etag", "cache", "variants": {encoding: bytes}}.
+    """
+    manifest = {}
+    if not os.path.isdir(dist_dir):
+        return manifest
+
+    for root, _, files in os.walk(dist_dir):
+        for name in files:
+            file_path = os.path.join(root, name)
+            url_path = os.path.relpath(file_path, dist_dir).replace(os.sep, "/")
+            with open(file_path, "rb") as f:
+                body = f.read()
+
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            variants = {"identity": body}
+            if media_type.startswith(COMPRESSIBLE_TYPES) and len(body) >= MIN_COMPRESS_SIZE:
+                gz = gzip.compress(body, compresslevel=9, mtime=0)
+                if len(gz) < len(body):
+                    variants["gzip"] = gz
+                if brotli is not None:
+                    br = brotli.compress(body, quality=11)
+                    if len(br) < len(body):
+                        variants["br"] = br
+
+            # Vite content-hashes everything under assets/, so those never change
+            if url_path.startswith("assets/"):
+                cache = "public, max-age=31536000, immutable"
+            else:
+                cache = "no-cache"
+
+            manifest[url_path] = {
+                "type": media_type,
+                "etag": '"' + hashlib.sha1(body).hexdigest()[:16] + '"',
+                "cache": cache,
+                "variants": variants,
+            }
+    return manifest
+
+def choose_encoding(accept_encoding, variants):
+    accepted = set()
+    refused = set()
+    for part in accept_encoding.split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(token)
+        else:
+            refused.add(token)
+    for encoding in ("br", "gzip"):
+        if encoding not in variants or encoding in refused:
+            continue
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return "identity"
+
+def asset_response(request: Request, asset):
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), asset["variants"])
+    etag = asset["etag"] if encoding == "identity" else asset["etag"][:-1] + "-" + encoding + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": asset["cache"],
+        "Vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=asset["variants"][encoding], media_type=asset["type"], headers=headers)
+
+ASSET_MANIFEST = build_asset_manifest(FRONTEND_DIST)
+print(f"✅ Frontend manifest: {len(ASSET_MANIFEST)} files cached in memory")
 
-@app.get("/{full_path:path}")
-async def serve_react_app(full_path: str):
+@app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+async def serve_react_app(full_path: str, request: Request):
     # Ignore system paths
     if full_path in ["docs", "redoc", "openapi.json"]:
         return None # Let FastAPI handle these
     
-    file_path = os.path.join(FRONTEND_DIST, full_path)
+    asset = ASSET_MANIFEST.get(full_path)
+    if asset:
+        return asset_response(request, asset)
 
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return FileResponse(file_path)
+    # Unknown hashed assets are real 404s, not SPA routes
+    if full_path.startswith("assets/"):
+        raise HTTPException(status_code=404, detail="Asset not found")
 
-    index_path = os.path.join(FRONTEND_DIST, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
+    index = ASSET_MANIFEST.get("index.html")
+    if index:
+        return asset_response(request, index)
 
     return {"error": "Frontend build not found"}